@@ -8,12 +8,36 @@ This version:
 3. Stores results in SQLite database
 """
 
+import asyncio
+import hashlib
 import os
 import sqlite3
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import List
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+# CPU threads for the embedding model, set BEFORE torch/transformers load.
+# Embedding starts after the loader thread pool has finished, so by default
+# it uses every core; lower this if several analyzers run at once.
+EMBEDDING_THREADS = os.cpu_count() or 1
+os.environ.setdefault("OMP_NUM_THREADS", str(EMBEDDING_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(EMBEDDING_THREADS))
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+def embedding_threads() -> int:
+    """Read the torch thread count from OMP_NUM_THREADS
+    
+    OpenMP also accepts nested lists like "4,2"; only the outer level applies
+    here. Anything unparsable falls back to EMBEDDING_THREADS.
+    """
+    try:
+        threads = int(os.environ["OMP_NUM_THREADS"].split(",")[0])
+    except (KeyError, ValueError):
+        return EMBEDDING_THREADS
+    return threads if threads > 0 else EMBEDDING_THREADS
 
 # LangChain imports
 from langchain_core.documents import Document
@@ -22,11 +46,27 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 from langchain_community.vectorstores import FAISS
 from langchain_groq import ChatGroq
+import groq
+import httpx
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.chains import create_retrieval_chain
 
 # Local embeddings (FREE, no API needed!)
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+import faiss
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+
+torch.set_num_threads(embedding_threads())
+
+# Optional ONNX Runtime backend: pip install optimum[onnxruntime]
+try:
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+except ImportError:
+    ORTModelForFeatureExtraction = None
 
 # ============================================================================
 # CONFIGURATION
@@ -35,16 +75,36 @@ from langchain_community.embeddings import HuggingFaceEmbeddings
 # Paths
 DOCS_PATH = Path("./contracts")
 INDEX_PATH = Path("./faiss_index")
+SIGNATURE_FILE = INDEX_PATH / "sig.txt"
+SETTINGS_SIGNATURE_FILE = INDEX_PATH / "settings_sig.txt"
 DB_PATH = Path("./contract_analysis.db")
 
 # Settings
-REBUILD_INDEX = True
-CHUNK_SIZE = 800
-CHUNK_OVERLAP = 120
+REBUILD_INDEX = False  # Force a rebuild even if the documents haven't changed
+CHUNK_SIZE = 240      # MiniLM tokens (its 256-token limit includes [CLS]/[SEP])
+CHUNK_OVERLAP = 32    # Tokens
 TOP_K = 4
 
+# Embeddings
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 128
+EMBEDDING_FP16 = True  # Half precision on GPU (ignored on CPU)
+EMBEDDING_MAX_TOKENS = 256
+USE_ONNX = True        # Use ONNX Runtime when optimum is installed
+ONNX_MODEL_PATH = Path("./onnx_minilm")
+
+# FAISS index (flat below HNSW_MIN_VECTORS, HNSW above)
+HNSW_MIN_VECTORS = 1000
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+QUANTIZE_INT8 = True  # Store vectors as 8-bit scalars (4x smaller index)
+
 # GROQ Model - Updated to current working model
 GROQ_MODEL = "llama-3.3-70b-versatile"  # Latest Llama 3.3 model
+GROQ_REQUESTS_PER_MINUTE = 30  # Free tier RPM limit
+GROQ_MAX_RETRIES = 3           # Attempts per question on 429 (exponential backoff)
+GROQ_MAX_CONNECTIONS = 32      # Keep-alive pool shared by all GROQ requests
+GROQ_TIMEOUT = 60              # Seconds
 
 # ============================================================================
 # CHECK API KEYS
@@ -69,11 +129,32 @@ def check_api_keys():
 # DATABASE SETUP
 # ============================================================================
 
+_db = None
+
+def get_db() -> sqlite3.Connection:
+    """Return the shared SQLite connection, opening it in WAL mode on first use"""
+    global _db
+    
+    if _db is None:
+        _db = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("PRAGMA synchronous=NORMAL")
+    
+    return _db
+
+def close_db():
+    """Close the shared SQLite connection"""
+    global _db
+    
+    if _db is not None:
+        _db.close()
+        _db = None
+
 def setup_database():
     """Create SQLite database for storing analysis results"""
     print("🗄️ Setting up database...")
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Contracts table
@@ -84,10 +165,16 @@ def setup_database():
             file_path TEXT,
             upload_date TEXT,
             total_chunks INTEGER,
-            processed BOOLEAN DEFAULT 0
+            processed BOOLEAN DEFAULT 0,
+            content_hash TEXT
         )
     """)
     
+    # Older databases were created without content_hash
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(contracts)")}
+    if "content_hash" not in columns:
+        cursor.execute("ALTER TABLE contracts ADD COLUMN content_hash TEXT")
+    
     # Analysis results table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS analysis_results (
@@ -130,7 +217,6 @@ def setup_database():
     """)
     
     conn.commit()
-    conn.close()
     
     print(f"✅ Database created: {DB_PATH}\n")
 
@@ -147,24 +233,38 @@ def find_files(path: Path) -> List[Path]:
     files = [p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in exts]
     return files
 
+def load_document(p: Path) -> List[Document]:
+    """Load a single document with the matching LangChain loader"""
+    
+    if p.suffix.lower() in {".txt", ".md"}:
+        return TextLoader(str(p), encoding="utf-8").load()
+    
+    if p.suffix.lower() == ".pdf":
+        return PyPDFLoader(str(p)).load()
+    
+    return []
+
+def safe_load_document(p: Path):
+    """Load a document, returning (docs, error) instead of raising"""
+    try:
+        return load_document(p), None
+    except Exception as e:
+        return [], e
+
 def load_documents(paths: List[Path]) -> List[Document]:
-    """Load documents using LangChain loaders"""
+    """Load documents using LangChain loaders (in parallel threads)"""
     docs: List[Document] = []
     
-    for p in paths:
-        try:
-            print(f"  📄 Loading: {p.name}")
-            
-            if p.suffix.lower() in {".txt", ".md"}:
-                loader = TextLoader(str(p), encoding="utf-8")
-                docs.extend(loader.load())
-            
-            elif p.suffix.lower() == ".pdf":
-                loader = PyPDFLoader(str(p))
-                docs.extend(loader.load())
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(paths)))) as executor:
+        results = list(executor.map(safe_load_document, paths))
+    
+    for p, (loaded, error) in zip(paths, results):
+        print(f"  📄 Loading: {p.name}")
         
-        except Exception as e:
-            print(f"  ⚠️ Failed to load {p.name}: {e}")
+        if error is not None:
+            print(f"  ⚠️ Failed to load {p.name}: {error}")
+        else:
+            docs.extend(loaded)
     
     return docs
 
@@ -172,42 +272,259 @@ def load_documents(paths: List[Path]) -> List[Document]:
 # TEXT SPLITTING
 # ============================================================================
 
+# The embedding model's own WordPiece tokenizer, loaded on first use. It
+# splits legal vocabulary finer than general-purpose BPE tokenizers, so
+# measuring with anything else lets full-size chunks overflow the model.
+_tokenizer = None
+
+def token_length(text: str) -> int:
+    """Count embedding-model tokens, excluding the [CLS]/[SEP] it adds"""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    return len(_tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    length_function=token_length,
+    separators=["\n\n", "\n", " ", ""],
+)
+
 def split_documents(docs: List[Document]) -> List[Document]:
     """Split documents into chunks"""
     
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-    )
-    
-    chunks = splitter.split_documents(docs)
+    chunks = SPLITTER.split_documents(docs)
     return chunks
 
 # ============================================================================
 # VECTOR STORE (Using FREE local embeddings)
 # ============================================================================
 
-def build_or_load_faiss(chunks: List[Document], rebuild: bool) -> FAISS:
-    """Create FAISS vector store with FREE local embeddings"""
+def embedding_device() -> str:
+    """Pick the fastest available device for the embedding model"""
+    
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings computed with ONNX Runtime (mean pooled, normalized)"""
+    
+    def __init__(self, model_path: Path, batch_size: int):
+        if not model_path.exists():
+            print(f"   Exporting {EMBEDDING_MODEL} to ONNX (one time)...")
+            model = ORTModelForFeatureExtraction.from_pretrained(EMBEDDING_MODEL, export=True)
+            tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+            model.save_pretrained(model_path)
+            tokenizer.save_pretrained(model_path)
+        
+        # Ask onnxruntime, not torch: the CPU-only wheel has no CUDA provider
+        # even on a GPU machine
+        if "CUDAExecutionProvider" in onnxruntime.get_available_providers():
+            provider = "CUDAExecutionProvider"
+        else:
+            provider = "CPUExecutionProvider"
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_path, provider=provider)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.batch_size = batch_size
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=EMBEDDING_MAX_TOKENS,
+            return_tensors="np",
+        )
+        hidden = self.model(**inputs).last_hidden_state
+        
+        # Mean pooling over real tokens, then L2 normalize
+        mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+        vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
     
-    print("🔧 Initializing FREE local embeddings (no API needed)...")
-    print("   (First time may take 1-2 minutes to download model...)")
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed(texts[start:start + self.batch_size]).tolist())
+        return vectors
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+def make_embeddings() -> Embeddings:
+    """Create batched local embeddings on the best available device"""
+    
+    if USE_ONNX and ORTModelForFeatureExtraction is not None:
+        print(f"   Backend: ONNX Runtime, batch size: {EMBEDDING_BATCH_SIZE}")
+        return OnnxEmbeddings(ONNX_MODEL_PATH, EMBEDDING_BATCH_SIZE)
+    
+    device = embedding_device()
+    model_kwargs = {"device": device}
+    
+    if EMBEDDING_FP16 and device == "cuda":
+        model_kwargs["model_kwargs"] = {"torch_dtype": torch.float16}
+    
+    print(f"   Device: {device}, batch size: {EMBEDDING_BATCH_SIZE}")
+    
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs=model_kwargs,
+        encode_kwargs={
+            "batch_size": EMBEDDING_BATCH_SIZE,
+            "normalize_embeddings": True,
+        }
+    )
+
+def optimize_index(vectorstore: FAISS) -> FAISS:
+    """Rebuild the flat index as HNSW and/or int8 depending on corpus size"""
+    
+    flat = vectorstore.index
+    use_hnsw = flat.ntotal >= HNSW_MIN_VECTORS
+    
+    if not use_hnsw and not QUANTIZE_INT8:
+        return vectorstore
+    
+    # e.g. "HNSW32,SQ8", "HNSW32,Flat" or "SQ8"
+    storage = "SQ8" if QUANTIZE_INT8 else "Flat"
+    description = f"HNSW{HNSW_M},{storage}" if use_hnsw else storage
+    
+    print(f"🧭 Building {description} index for {flat.ntotal} vectors...")
+    
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    index = faiss.index_factory(flat.d, description)
+    index.train(vectors)
+    index.add(vectors)
+    
+    if use_hnsw:
+        faiss.downcast_index(index).hnsw.efSearch = HNSW_EF_SEARCH
     
-    # Use FREE local embeddings - no API calls!
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+    vectorstore.index = index
+    return vectorstore
+
+def settings_signature() -> str:
+    """Hash the chunking, embedding and index settings"""
+    
+    settings = [
+        CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL,
+        USE_ONNX and ORTModelForFeatureExtraction is not None,
+        HNSW_MIN_VECTORS, HNSW_M, QUANTIZE_INT8,
+    ]
+    
+    return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()
+
+def index_signature(files: List[Path]) -> str:
+    """Hash the inputs and settings that determine the FAISS index contents"""
+    
+    file_info = sorted(
+        (str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in files
     )
     
+    payload = json.dumps([file_info, settings_signature()])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def write_signatures(signature: str):
+    """Record what the saved FAISS index was built from"""
+    
+    SIGNATURE_FILE.write_text(signature, encoding="utf-8")
+    SETTINGS_SIGNATURE_FILE.write_text(settings_signature(), encoding="utf-8")
+
+def settings_are_current() -> bool:
+    """Check whether the saved FAISS index used the current settings"""
+    
+    if not (INDEX_PATH / "index.faiss").exists() or not SETTINGS_SIGNATURE_FILE.exists():
+        return False
+    
+    return SETTINGS_SIGNATURE_FILE.read_text(encoding="utf-8").strip() == settings_signature()
+
+def content_hash(p: Path) -> str:
+    """Hash a document's bytes to detect content changes"""
+    return hashlib.blake2b(p.read_bytes()).hexdigest()
+
+def chunk_counts(chunks: List[Document]) -> dict:
+    """Count chunks per source filename"""
+    
+    counts = {}
+    for chunk in chunks:
+        name = Path(chunk.metadata.get("source", "unknown")).name
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+def update_faiss_incrementally(vectorstore: FAISS, embeddings: Embeddings,
+                               changed_chunks: List[Document], stale_names: set) -> FAISS:
+    """Drop chunks from stale files and embed only the changed chunks
+    
+    HNSW can't delete vectors and SQ8 ranges were trained on the old corpus,
+    so the surviving vectors are decoded from the saved index and the index
+    is rebuilt (and retrained) from them plus the new ones. Only the delta
+    goes through the embedding model.
+    """
+    
+    index = vectorstore.index
+    vectors = index.reconstruct_n(0, index.ntotal)
+    
+    kept_docs, kept_rows = [], []
+    for row, doc_id in sorted(vectorstore.index_to_docstore_id.items()):
+        doc = vectorstore.docstore.search(doc_id)
+        if Path(doc.metadata.get("source", "")).name not in stale_names:
+            kept_docs.append(doc)
+            kept_rows.append(row)
+    
+    print(f"🗑️  Removing {index.ntotal - len(kept_rows)} outdated chunks...")
+    
+    new_vectors = np.empty((0, index.d), dtype=np.float32)
+    if changed_chunks:
+        print(f"➕ Embedding {len(changed_chunks)} new chunks...")
+        new_vectors = np.asarray(
+            embeddings.embed_documents([c.page_content for c in changed_chunks]),
+            dtype=np.float32,
+        )
+    
+    docs = kept_docs + changed_chunks
+    all_vectors = np.vstack([vectors[kept_rows], new_vectors])
+    
+    # from_embeddings builds a flat index without re-embedding anything;
+    # optimize_index then retrains SQ8 / rebuilds HNSW for the new corpus
+    vectorstore = FAISS.from_embeddings(
+        list(zip([d.page_content for d in docs], all_vectors.tolist())),
+        embeddings,
+        metadatas=[d.metadata for d in docs],
+    )
+    vectorstore = optimize_index(vectorstore)
+    
+    vectorstore.save_local(str(INDEX_PATH))
+    print(f"✅ Updated FAISS index at: {INDEX_PATH.resolve()}\n")
+    
+    return vectorstore
+
+def index_is_current(signature: str) -> bool:
+    """Check whether the saved FAISS index was built from the same inputs"""
+    
+    if not (INDEX_PATH / "index.faiss").exists() or not SIGNATURE_FILE.exists():
+        return False
+    
+    return SIGNATURE_FILE.read_text(encoding="utf-8").strip() == signature
+
+def build_or_load_faiss(chunks: List[Document], rebuild: bool, embeddings: Embeddings,
+                        signature: str = None) -> FAISS:
+    """Create or load the FAISS vector store with the given local embeddings"""
+    
     if rebuild:
         print("🔁 Building FAISS index from documents...")
         
         vectorstore = FAISS.from_documents(chunks, embeddings)
+        vectorstore = optimize_index(vectorstore)
         
         # Save to disk
         INDEX_PATH.mkdir(parents=True, exist_ok=True)
         vectorstore.save_local(str(INDEX_PATH))
         
+        if signature:
+            write_signatures(signature)
+        
         print(f"✅ Saved FAISS index to: {INDEX_PATH.resolve()}\n")
         return vectorstore
     
@@ -220,6 +537,9 @@ def build_or_load_faiss(chunks: List[Document], rebuild: bool) -> FAISS:
             allow_dangerous_deserialization=True
         )
         
+        if isinstance(vectorstore.index, faiss.IndexHNSW):
+            vectorstore.index.hnsw.efSearch = HNSW_EF_SEARCH
+        
         print("✅ Loaded FAISS index\n")
         return vectorstore
 
@@ -241,6 +561,35 @@ def make_retriever(vectorstore: FAISS):
 # RAG CHAIN WITH GROQ
 # ============================================================================
 
+def make_groq_clients():
+    """Create GROQ clients backed by pooled HTTP/2 keep-alive connections
+    
+    ChatGroq only accepts a sync httpx client, so both completion clients
+    are built here and passed in directly.
+    """
+    
+    api_key = os.environ["GROQ_API_KEY"]
+    limits = httpx.Limits(
+        max_connections=GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+    )
+    
+    http_client = httpx.Client(
+        transport=httpx.HTTPTransport(http2=True, limits=limits, retries=3),
+        timeout=GROQ_TIMEOUT,
+    )
+    http_async_client = httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3),
+        timeout=GROQ_TIMEOUT,
+    )
+    
+    # invoke_with_retry already backs off on 429s through the rate limiter;
+    # SDK retries on top would resend one question up to 9 times
+    client = groq.Groq(api_key=api_key, http_client=http_client, max_retries=0)
+    async_client = groq.AsyncGroq(api_key=api_key, http_client=http_async_client, max_retries=0)
+    
+    return client.chat.completions, async_client.chat.completions
+
 def make_rag_chain(retriever):
     """Build RAG chain with GROQ"""
     
@@ -280,10 +629,13 @@ HIPAA Requirements to check:
     
     # Initialize GROQ LLM
     print("🔧 Initializing GROQ LLM...")
+    client, async_client = make_groq_clients()
     llm = ChatGroq(
         model=GROQ_MODEL,
         temperature=0.2,
-        max_tokens=2000
+        max_tokens=2000,
+        client=client,
+        async_client=async_client,
     )
     
     # Create chains
@@ -298,14 +650,46 @@ HIPAA Requirements to check:
 # QUERY SYSTEM
 # ============================================================================
 
-def ask_question(rag_chain, question: str) -> dict:
-    """Ask a question and get answer with sources"""
+_groq_tokens = float(GROQ_REQUESTS_PER_MINUTE)
+_groq_updated = time.monotonic()
+
+async def wait_for_groq_slot():
+    """Block until the GROQ token bucket allows another request"""
+    global _groq_tokens, _groq_updated
+    
+    while True:
+        now = time.monotonic()
+        refill = (now - _groq_updated) * GROQ_REQUESTS_PER_MINUTE / 60.0
+        _groq_tokens = min(float(GROQ_REQUESTS_PER_MINUTE), _groq_tokens + refill)
+        _groq_updated = now
+        
+        if _groq_tokens >= 1:
+            _groq_tokens -= 1
+            return
+        
+        await asyncio.sleep((1 - _groq_tokens) * 60.0 / GROQ_REQUESTS_PER_MINUTE)
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is a GROQ 429 response"""
+    return isinstance(error, groq.RateLimitError) or getattr(error, "status_code", None) == 429
+
+async def invoke_with_retry(rag_chain, question: str) -> dict:
+    """Invoke the RAG chain, backing off and retrying on rate-limit errors"""
     
-    print(f"❓ Question: {question}\n")
-    print("🤔 GROQ AI is analyzing...\n")
+    for attempt in range(GROQ_MAX_RETRIES):
+        await wait_for_groq_slot()
+        try:
+            return await rag_chain.ainvoke({"input": question})
+        except Exception as e:
+            if attempt == GROQ_MAX_RETRIES - 1 or not is_rate_limit_error(e):
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+async def ask_question(rag_chain, question: str) -> dict:
+    """Ask a question and get answer with sources"""
     
     try:
-        result = rag_chain.invoke({"input": question})
+        result = await invoke_with_retry(rag_chain, question)
         
         answer = result.get("answer", "No answer generated")
         context_docs = result.get("context", [])
@@ -339,63 +723,78 @@ def ask_question(rag_chain, question: str) -> dict:
             "context": []
         }
 
+async def ask_all_questions(rag_chain, questions: List[str]) -> List[dict]:
+    """Ask all questions concurrently, returning results in question order"""
+    
+    print(f"🤔 GROQ AI is analyzing {len(questions)} questions in parallel...\n")
+    
+    return await asyncio.gather(*(ask_question(rag_chain, q) for q in questions))
+
 # ============================================================================
 # DATABASE OPERATIONS
 # ============================================================================
 
-def register_contract(filename: str, file_path: str, chunk_count: int) -> int:
-    """Register a contract in the database"""
+def register_contracts_bulk(conn: sqlite3.Connection, files: List[Path], chunk_counts: dict,
+                            hashes: dict):
+    """Register many contracts in a single transaction"""
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    now = datetime.now().isoformat()
     
-    cursor.execute("""
-        INSERT OR REPLACE INTO contracts (filename, file_path, upload_date, total_chunks, processed)
-        VALUES (?, ?, ?, ?, 1)
-    """, (filename, file_path, datetime.now().isoformat(), chunk_count))
-    
-    contract_id = cursor.lastrowid
+    conn.executemany("""
+        INSERT OR REPLACE INTO contracts (filename, file_path, upload_date, total_chunks, processed, content_hash)
+        VALUES (?, ?, ?, ?, 1, ?)
+    """, [(f.name, str(f), now, chunk_counts.get(f.name, 0), hashes.get(f)) for f in files])
     
     conn.commit()
-    conn.close()
+
+def load_content_hashes(conn: sqlite3.Connection) -> dict:
+    """Return {filename: content_hash} for all registered contracts"""
     
-    return contract_id
+    rows = conn.execute("SELECT filename, content_hash FROM contracts")
+    return {filename: file_hash for filename, file_hash in rows}
 
-def save_analysis_to_db(contract_id: int, result: dict):
-    """Save analysis results to database"""
+def remove_contracts(conn: sqlite3.Connection, filenames: List[str]):
+    """Remove contracts that no longer exist on disk (caller commits)"""
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn.executemany("DELETE FROM contracts WHERE filename = ?", [(f,) for f in filenames])
+
+def analysis_row(contract_id: int, result: dict) -> tuple:
+    """Build an analysis_results row from a query result"""
     
-    cursor.execute("""
-        INSERT INTO analysis_results (contract_id, question, answer, sources, timestamp)
-        VALUES (?, ?, ?, ?, ?)
-    """, (
+    return (
         contract_id,
         result["question"],
         result["answer"],
         "\n".join(result["sources"]),
         datetime.now().isoformat()
-    ))
+    )
+
+def save_analysis_to_db(conn: sqlite3.Connection, contract_id: int, result: dict):
+    """Save analysis results to database"""
+    
+    save_analyses_to_db(conn, [analysis_row(contract_id, result)])
+
+def save_analyses_to_db(conn: sqlite3.Connection, rows: List[tuple]):
+    """Save many analysis rows in a single transaction"""
+    
+    conn.executemany("""
+        INSERT INTO analysis_results (contract_id, question, answer, sources, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
     
     conn.commit()
-    conn.close()
 
-def save_compliance_finding(contract_id: int, regulation: str, status: str, 
+def save_compliance_finding(conn: sqlite3.Connection, contract_id: int, regulation: str, status: str, 
                            missing: str, risk: str, recommendations: str):
     """Save compliance findings"""
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    conn.execute("""
         INSERT INTO compliance_findings 
         (contract_id, regulation, status, missing_clauses, risk_level, recommendations, analysis_date)
         VALUES (?, ?, ?, ?, ?, ?, ?)
     """, (contract_id, regulation, status, missing, risk, recommendations, datetime.now().isoformat()))
     
     conn.commit()
-    conn.close()
 
 # ============================================================================
 # REPORTING
@@ -409,7 +808,7 @@ def generate_final_report():
     print("="*80)
     print()
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Get all contracts
@@ -429,11 +828,66 @@ def generate_final_report():
         print(f"   Analyses performed: {analysis_count}")
         print()
     
-    conn.close()
-    
     print(f"💾 Full results saved in: {DB_PATH}")
     print()
 
+# ============================================================================
+# INDEX MAINTENANCE
+# ============================================================================
+
+def prepare_vectorstore(conn: sqlite3.Connection, files: List[Path]) -> FAISS:
+    """Load, incrementally update, or fully rebuild the FAISS index"""
+    
+    # Only rebuild when documents or index settings changed
+    signature = index_signature(files)
+    
+    print("🔧 Initializing FREE local embeddings (no API needed)...")
+    print("   (First time may take 1-2 minutes to download model...)")
+    
+    # Use FREE local embeddings - no API calls! Loaded once for every branch.
+    embeddings = make_embeddings()
+    
+    if not REBUILD_INDEX and index_is_current(signature):
+        print("♻️  Documents unchanged since last run - reusing FAISS index\n")
+        return build_or_load_faiss([], False, embeddings)
+    
+    # Content hashes are only needed once something may have changed
+    hashes = {p: content_hash(p) for p in files}
+    
+    if not REBUILD_INDEX and settings_are_current():
+        # Same settings, some files changed: only re-embed the delta
+        stored = load_content_hashes(conn)
+        changed = [p for p in files if stored.get(p.name) != hashes[p]]
+        removed = [name for name in stored if name not in {p.name for p in files}]
+        
+        print(f"🔄 {len(changed)} changed, {len(removed)} removed documents\n")
+        
+        vectorstore = build_or_load_faiss([], False, embeddings)
+        
+        if changed or removed:
+            changed_chunks = split_documents(load_documents(changed))
+            vectorstore = update_faiss_incrementally(
+                vectorstore, embeddings, changed_chunks, {p.name for p in changed} | set(removed)
+            )
+            remove_contracts(conn, removed)
+            register_contracts_bulk(conn, changed, chunk_counts(changed_chunks), hashes)
+        
+        write_signatures(signature)
+        return vectorstore
+    
+    docs = load_documents(files)
+    print(f"\n✅ Loaded {len(docs)} documents\n")
+    
+    print(f"✂️  Splitting into chunks (size={CHUNK_SIZE}, overlap={CHUNK_OVERLAP} tokens)...")
+    chunks = split_documents(docs)
+    print(f"✅ Created {len(chunks)} chunks\n")
+    
+    # Register contracts in DB
+    register_contracts_bulk(conn, files, chunk_counts(chunks), hashes)
+    
+    # Build vector store with FREE embeddings
+    return build_or_load_faiss(chunks, True, embeddings, signature)
+
 # ============================================================================
 # MAIN PIPELINE
 # ============================================================================
@@ -451,33 +905,19 @@ def main():
     
     # Setup database
     setup_database()
+    conn = get_db()
     
-    # Load documents
-    chunks: List[Document] = []
+    # Scan documents
+    print(f"📁 Scanning documents in: {DOCS_PATH.resolve()}")
     
-    if REBUILD_INDEX:
-        print(f"📁 Scanning documents in: {DOCS_PATH.resolve()}")
-        
-        files = find_files(DOCS_PATH)
-        if not files:
-            print("❌ No files found!")
-            return
-        
-        print(f"📥 Found {len(files)} files\n")
-        
-        docs = load_documents(files)
-        print(f"\n✅ Loaded {len(docs)} documents\n")
-        
-        print(f"✂️  Splitting into chunks (size={CHUNK_SIZE}, overlap={CHUNK_OVERLAP})...")
-        chunks = split_documents(docs)
-        print(f"✅ Created {len(chunks)} chunks\n")
-        
-        # Register contracts in DB
-        for file in files:
-            register_contract(file.name, str(file), len(chunks))
+    files = find_files(DOCS_PATH)
+    if not files:
+        print("❌ No files found!")
+        return
     
-    # Build vector store with FREE embeddings
-    vectorstore = build_or_load_faiss(chunks, REBUILD_INDEX)
+    print(f"📥 Found {len(files)} files\n")
+    
+    vectorstore = prepare_vectorstore(conn, files)
     
     # Create retriever and RAG chain
     retriever = make_retriever(vectorstore)
@@ -500,11 +940,13 @@ def main():
     print("="*80)
     print()
     
-    for i, question in enumerate(questions, 1):
+    analysis_rows = []
+    results = asyncio.run(ask_all_questions(rag, questions))
+    
+    for i, result in enumerate(results, 1):
         print(f"\n📋 ANALYSIS {i}/{len(questions)}")
         print("-"*80)
-        
-        result = ask_question(rag, question)
+        print(f"❓ Question: {result['question']}\n")
         
         print("💡 Answer:")
         print(result["answer"])
@@ -516,15 +958,19 @@ def main():
         
         print("\n" + "="*80)
         
-        # Save to database
-        save_analysis_to_db(1, result)
+        # Queue for database
+        analysis_rows.append(analysis_row(1, result))
+    
+    # Save all analyses in one transaction
+    save_analyses_to_db(conn, analysis_rows)
     
     # Generate final report
     generate_final_report()
+    close_db()
     
     print("✅ ANALYSIS COMPLETE!")
     print(f"📁 Database: {DB_PATH.resolve()}")
-    print("\n💡 TIP: Set REBUILD_INDEX = False next time to load faster!")
+    print("\n💡 TIP: Set REBUILD_INDEX = True to force a full re-index")
     print()
 
 # ============================================================================
@@ -2,53 +2,328 @@
 Convert TXT contract files to PDF format
 """
 
+import asyncio
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from langchain.chains.combine_documents_chain import create_stuff_documents_chain
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
 
+logger = logging.getLogger(__name__)
 
+# Styles are built once per process and shared by every document
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=30,
+)
+
+# spaceAfter is the gap left after every paragraph
+_BODY_STYLE = ParagraphStyle(
+    'Body',
+    parent=_STYLES['BodyText'],
+    spaceAfter=0.1*inch,
+)
+
+# Optional TTF for body text (e.g. DejaVuSans for non-Latin characters).
+# None keeps the built-in Helvetica, which needs no embedding.
+BODY_FONT_FILE = None
+
+def _register_fonts():
+    """Register and resolve fonts once per process instead of per document"""
+    
+    if BODY_FONT_FILE:
+        try:
+            pdfmetrics.registerFont(TTFont('Body', BODY_FONT_FILE))
+            _BODY_STYLE.fontName = 'Body'
+        except Exception as e:
+            logger.debug("Falling back to %s: %s", _BODY_STYLE.fontName, e)
+    
+    # Load metrics now so every document (and forked worker) reuses them
+    for style in (_TITLE_STYLE, _BODY_STYLE):
+        pdfmetrics.getFont(style.fontName)
+
+_register_fonts()
+
+
+# Page geometry (matches SimpleDocTemplate's default 1 inch margins)
+_PAGE_WIDTH, _PAGE_HEIGHT = letter
+_MARGIN = inch
+_FRAME_WIDTH = _PAGE_WIDTH - 2 * _MARGIN
+
+
+# A run of consecutive lines that each contain a non-whitespace character.
+# Matching runs in the regex engine replaces a split() plus per-line strip().
+# Anchored to line starts: unanchored, a whitespace-only line is rescanned
+# from every offset, which is quadratic in its length.
+_BLOCK_RE = re.compile(r'(?m)^[^\n]*\S[^\n]*(?:\n[^\n]*\S[^\n]*)*')
+
+def _text_blocks(text: str):
+    """Return each paragraph (a run of non-blank lines) of text"""
+    return _BLOCK_RE.findall(text)
+
+# Files at least this big are scanned through mmap instead of read() + decode
+MMAP_MIN_BYTES = 256 * 1024
+
+# Coarse bytes version of _BLOCK_RE. Its \S only knows ASCII whitespace, so
+# a match can span lines that str.strip() treats as blank (e.g. NBSP-only
+# lines); each match is split again with _BLOCK_RE after decoding.
+_BLOCK_RE_BYTES = re.compile(rb'(?m)^[^\n]*\S[^\n]*(?:\n[^\n]*\S[^\n]*)*')
+
+def _read_blocks(txt_file: str) -> list:
+    """Read the paragraphs of a TXT file
+    
+    Large files are matched straight out of the page cache, so only the
+    paragraphs get decoded rather than a full bytes copy and a full str copy.
+    Both paths return the same paragraphs for the same file.
+    """
+    
+    if os.path.getsize(txt_file) < MMAP_MIN_BYTES:
+        return _text_blocks(Path(txt_file).read_text(encoding='utf-8'))
+    
+    blocks = []
+    with open(txt_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in _BLOCK_RE_BYTES.finditer(mm):
+            # Translate line endings the way text-mode reads do
+            text = m.group().decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+            blocks.extend(_text_blocks(text))
+    return blocks
+
+def _wrap(text: str, style) -> list:
+    """Split text into lines that fit the frame width
+    
+    simpleSplit never breaks a single word, so words wider than the frame
+    (long URLs, IDs, signature underscores) are broken between characters,
+    like Paragraph does with splitLongWords.
+    """
+    
+    font, size = style.fontName, style.fontSize
+    lines = []
+    for part in simpleSplit(text, font, size, _FRAME_WIDTH):
+        if stringWidth(part, font, size) <= _FRAME_WIDTH:
+            lines.append(part)
+            continue
+        
+        start, width = 0, 0
+        for i, ch in enumerate(part):
+            ch_width = stringWidth(ch, font, size)
+            if width + ch_width > _FRAME_WIDTH and i > start:
+                lines.append(part[start:i])
+                start, width = i, 0
+            width += ch_width
+        lines.append(part[start:])
+    return lines
+
+def _build_canvas_pdf(blocks, title: str, pdf_file: str):
+    """Draw the text straight onto a Canvas, skipping Platypus
+    
+    drawString takes raw text, so < and & need no escaping here.
+    """
+    
+    c = Canvas(pdf_file, pagesize=letter)
+    top, bottom = _PAGE_HEIGHT - _MARGIN, _MARGIN
+    y = top
+    
+    def draw(text, style):
+        nonlocal y
+        for part in _wrap(text, style):
+            if y - style.leading < bottom:
+                c.showPage()
+                y = top
+            y -= style.leading
+            c.setFont(style.fontName, style.fontSize)
+            c.drawString(_MARGIN, y + (style.leading - style.fontSize), part)
+    
+    draw(title, _TITLE_STYLE)
+    y -= _TITLE_STYLE.spaceAfter + 0.2*inch
+    
+    for block in blocks:
+        for line in block.split('\n'):
+            draw(line, _BODY_STYLE)
+        # Gap between two body paragraphs (spaceBefore + spaceAfter)
+        y -= _BODY_STYLE.spaceAfter + _BODY_STYLE.spaceBefore
+    
+    c.save()
+
+# Precomputed table for the filename-to-title mapping
+_UNDERSCORE = str.maketrans('_', ' ')
+
+def _title_for(txt_file: str) -> str:
+    """Turn a filename like vendor_agreement.txt into 'Vendor Agreement'"""
+    stem = os.path.splitext(os.path.basename(txt_file))[0]
+    return stem.translate(_UNDERSCORE).title()
+
+def _blocks_to_pdf(txt_file: str, blocks: list, pdf_file: str):
+    """Render paragraphs to pdf_file; returns None for a blank file"""
+    
+    # Nothing but whitespace: don't build a title-only PDF, and drop any PDF
+    # left over from before the file was emptied
+    if not blocks:
+        try:
+            os.remove(pdf_file)
+        except FileNotFoundError:
+            pass
+        return None
+    
+    _build_canvas_pdf(blocks, _title_for(txt_file), pdf_file)
+    return pdf_file
 
 def txt_to_pdf(txt_file: str, pdf_file: str):
-    """Convert a TXT file to PDF"""
+    """Convert a TXT file to PDF and return the PDF path (raises on error)
+    
+    Returns None if the file is empty, removing any stale PDF for it.
+    """
+    return _blocks_to_pdf(txt_file, _read_blocks(txt_file), pdf_file)
+
+def _text_to_pdf(txt_file: str, text: str, pdf_file: str):
+    """Convert already-read TXT contents to PDF and return the PDF path"""
+    return _blocks_to_pdf(txt_file, _text_blocks(text), pdf_file)
+
+# Below this many files, the process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 4
+
+# Files read ahead by the async pipeline while the current one is laid out
+PIPELINE_PREFETCH = 2
+
+def _pool_context():
+    """Prefer fork so workers inherit the already-loaded ReportLab state
+    
+    fork is only available on Linux/macOS. On Windows, spawned workers
+    re-import this module, which rebuilds the styles at import time.
+    """
     
-    # Read the text file
-    with open(txt_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('spawn')
+
+def _pdf_path(txt_file: str, output_folder: str) -> str:
+    """Return the output PDF path for a TXT file"""
     
-    # Create PDF
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
+    stem = os.path.splitext(os.path.basename(txt_file))[0]
+    return os.path.join(output_folder, f"{stem}.pdf")
+
+def _is_up_to_date(txt_file: str, pdf_file: str) -> bool:
+    """Check whether pdf_file exists and is newer than txt_file"""
     
-    # Add title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-    )
+    try:
+        return os.stat(pdf_file).st_mtime >= os.stat(txt_file).st_mtime
+    except OSError:
+        return False
+
+def _convert_one(txt_file: str, output_folder: str):
+    """Convert one TXT file into output_folder (top-level so workers can pickle it)"""
     
-    story.append(Paragraph(Path(txt_file).stem.replace('_', ' ').title(), title_style))
-    story.append(Spacer(1, 0.2*inch))
+    return txt_to_pdf(txt_file, _pdf_path(txt_file, output_folder))
+
+def _prefetch(paths):
+    """Ask the kernel to start reading every file into the page cache now
     
-    # Add content
-    body_style = styles['BodyText']
+    Issuing all the readahead hints up front lets the device queue and
+    reorder the reads before the first PDF build starts. No-op where
+    posix_fadvise isn't available (e.g. Windows, macOS).
+    """
     
-    # Split by lines and create paragraphs
-    for line in content.split('\n'):
-        if line.strip():
-            story.append(Paragraph(line, body_style))
-            story.append(Spacer(1, 0.1*inch))
+    if not hasattr(os, 'posix_fadvise'):
+        return
     
-    # Build PDF
-    doc.build(story)
-    print(f"✅ Created: {pdf_file}")
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+# Each conversion yields a status tuple (txt_file, pdf_file, error): pdf_file
+# is None for failed or empty inputs, error is None unless it failed
 
-def convert_all_txt_to_pdf(input_folder: str = "./contracts", output_folder: str = "./contracts_pdf"):
-    """Convert all TXT files in a folder to PDF"""
+def _convert_serial(txt_files, output_folder: str) -> list:
+    """Convert files one at a time in this process"""
+    
+    results = []
+    for txt_file in txt_files:
+        try:
+            results.append((txt_file, _convert_one(txt_file, output_folder), None))
+        except Exception as e:
+            results.append((txt_file, None, e))
+    return results
+
+def _convert_in_pool(executor: ProcessPoolExecutor, txt_files, output_folder: str) -> list:
+    """Convert files on a process pool, collecting a status per file"""
+    
+    futures = {
+        executor.submit(_convert_one, txt_file, output_folder): txt_file
+        for txt_file in txt_files
+    }
+    
+    results = []
+    for future in as_completed(futures):
+        try:
+            results.append((futures[future], future.result(), None))
+        except Exception as e:
+            results.append((futures[future], None, e))
+    return results
+
+async def _convert_pipeline(txt_files, output_folder: str) -> list:
+    """Convert files in one process, reading ahead while the current PDF is laid out
+    
+    Used when a process pool isn't available. Reads run in a worker thread and
+    feed a bounded queue; layout runs on the default executor.
+    """
+    
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(maxsize=PIPELINE_PREFETCH)
+    
+    async def read_ahead():
+        for txt_file in txt_files:
+            try:
+                text = await asyncio.to_thread(Path(txt_file).read_text, encoding='utf-8')
+                await pending.put((txt_file, text, None))
+            except Exception as e:
+                await pending.put((txt_file, None, e))
+        await pending.put(None)
+    
+    reader = asyncio.create_task(read_ahead())
+    results = []
+    
+    while (item := await pending.get()) is not None:
+        txt_file, text, error = item
+        pdf_file = None
+        if error is None:
+            try:
+                pdf_file = await loop.run_in_executor(
+                    None, _text_to_pdf, txt_file, text, _pdf_path(txt_file, output_folder)
+                )
+            except Exception as e:
+                error = e
+        results.append((txt_file, pdf_file, error))
+    
+    await reader
+    return results
+
+def convert_all_txt_to_pdf(input_folder: str = "./contracts", output_folder: str = "./contracts_pdf",
+                           force: bool = False):
+    """Convert all TXT files in a folder to PDF
+    
+    Files whose PDF is already newer than the TXT are skipped unless force=True.
+    """
     
     input_path = Path(input_folder)
     output_path = Path(output_folder)
@@ -58,22 +333,64 @@ def convert_all_txt_to_pdf(input_folder: str = "./contracts", output_folder: str
     
     print("📄 Converting TXT files to PDF...\n")
     
-    txt_files = list(input_path.glob("*.txt"))
+    # scandir's DirEntry caches the file type, so no extra stat per entry
+    txt_files = []
+    if input_path.is_dir():
+        with os.scandir(input_path) as it:
+            txt_files = [e.path for e in it if e.name.endswith('.txt') and e.is_file()]
     
     if not txt_files:
         print("❌ No TXT files found!")
         return
     
-    for txt_file in txt_files:
-        pdf_file = output_path / f"{txt_file.stem}.pdf"
+    # Incremental build: skip files whose PDF is newer than the source
+    skipped = 0
+    if not force:
+        pending = []
+        for txt_file in txt_files:
+            if _is_up_to_date(txt_file, _pdf_path(txt_file, str(output_path))):
+                logger.debug("Skipping up-to-date PDF for %s", txt_file)
+                skipped += 1
+            else:
+                pending.append(txt_file)
+        txt_files = pending
+    
+    _prefetch(txt_files)
+    
+    if len(txt_files) > PARALLEL_MIN_FILES:
+        # Each conversion is independent and CPU-bound, so use every core
         try:
-            txt_to_pdf(str(txt_file), str(pdf_file))
-        except Exception as e:
-            print(f"❌ Error converting {txt_file.name}: {e}")
+            # fork starts every worker up front, so don't ask for more than the files
+            workers = min(os.cpu_count() or 1, len(txt_files))
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+        except (ImportError, OSError, NotImplementedError) as e:
+            # e.g. sandboxes without working semaphores
+            logger.debug("Process pool unavailable, using async pipeline: %s", e)
+            results = asyncio.run(_convert_pipeline(txt_files, str(output_path)))
+        else:
+            with executor:
+                results = _convert_in_pool(executor, txt_files, str(output_path))
+    
+    else:
+        results = _convert_serial(txt_files, str(output_path))
+    
+    # Report once at the end instead of printing from inside each conversion
+    converted = 0
+    for txt_file, pdf_file, error in results:
+        if error is not None:
+            print(f"❌ Error converting {os.path.basename(txt_file)}: {error}")
+        elif pdf_file is None:
+            print(f"⏭  Skipping empty: {txt_file}")
+        else:
+            print(f"✅ Created: {pdf_file}")
+            converted += 1
     
-    print(f"\n✅ Converted {len(txt_files)} files to PDF")
+    print(f"\n✅ Converted {converted} files to PDF")
+    if skipped:
+        print(f"⏭  Skipped {skipped} up-to-date files")
     print(f"📁 Saved to: {output_path.resolve()}")
 
 if __name__ == "__main__":
     # Install: pip install reportlab
-    convert_all_txt_to_pdf()
\ No newline at end of file
+    import sys
+    convert_all_txt_to_pdf(force="--force" in sys.argv[1:])
\ No newline at end of file